@@ -11,159 +11,445 @@ Author: Sanjay
 Challenge: https://careersatdemcon.com/decode-demcon/challenge-festival-schedule-generator
 """
 
+import os
+import re
 import sys
+import mmap
 import heapq
+import concurrent.futures
+from array import array
 from collections import defaultdict
-from typing import List, Tuple, Dict, Optional
+from typing import Iterable, List, Tuple, Dict, Optional, Union
 
+# Heap entries in the assignment kernel pack (end_time, stage_id) into one
+# int: end_time in the high bits, stage_id in the low _STAGE_BITS. Ordering
+# is preserved because stage IDs never exceed _STAGE_MASK (that would mean
+# over a million simultaneously occupied stages).
+_STAGE_BITS = 20
+_STAGE_MASK = (1 << _STAGE_BITS) - 1
 
-def parse_lines(lines: List[str]) -> List[Tuple[str, int, int]]:
+# The assignment kernel switches from the min-heap to a time-wheel when the
+# overall time span is at most this many slots per show; festival inputs
+# (minutes or hours in a day) land comfortably under it.
+_WHEEL_SPAN_FACTOR = 4
+
+# Classifies one input line per match: a show line, an ignorable line
+# (blank or comment), or anything else, which is reported as a parse error.
+# Every position in the buffer is covered, so finditer yields exactly one
+# match per line and the match index doubles as the line number.
+_LINE_RE = re.compile(
+    rb'(?m)^(?:'
+    rb'[ \t]*(?P<name>[^\s#]\S*)[ \t]+(?P<start>[+-]?\d+)[ \t]+(?P<end>[+-]?\d+)[ \t\r]*'
+    rb'|[ \t]*(?:#[^\n]*)?\r?'
+    rb'|(?P<bad>[^\n]*)'
+    rb')$'
+)
+
+
+def parse_lines(lines: Iterable[str]) -> List[Tuple[str, int, int]]:
     """
     Parses each line of the input into a (name, start, end) tuple.
-    
+
     Args:
-        lines: List of input lines to parse
-        
+        lines: Iterable of input lines to parse (e.g. a file object)
+
     Returns:
         List of (show_name, start_time, end_time) tuples
         
     Raises:
         ValueError: If input format is invalid
     """
-    shows = []
+    shows: List[Tuple[str, int, int]] = []
     for lineno, line in enumerate(lines, 1):
-        line = line.strip()
-        if not line or line.startswith('#'):
+        # Only trailing whitespace needs trimming: split() below ignores
+        # leading whitespace on its own, so a full strip() would just
+        # allocate an extra string per line
+        line = line.rstrip()
+        if not line:
             continue
-            
-        parts = line.split()
+
+        # Bounded split: at most 3 parts, so trailing junk on a malformed
+        # line doesn't get tokenized into a throwaway list
+        parts = line.split(None, 2)
+        name = parts[0]
+        if name.startswith('#'):
+            continue
+
         if len(parts) < 3:
             raise ValueError(f"Line {lineno}: expected 3 tokens (name start end), got: {line!r}")
-            
-        name = parts[0]
+
         try:
             start = int(parts[1])
             end = int(parts[2])
         except ValueError:
+            # With maxsplit=2 any extra tokens end up inside parts[2];
+            # report those as a token-count problem, not an integer one
+            if len(parts[2].split()) > 1:
+                raise ValueError(f"Line {lineno}: expected 3 tokens (name start end), got: {line!r}")
             raise ValueError(f"Line {lineno}: start/end must be integers: {line!r}")
             
         if end < start:
             raise ValueError(f"Line {lineno}: end time ({end}) cannot be before start time ({start}): {line!r}")
             
         shows.append((name, start, end))
-    
+
     return shows
 
 
-def assign_stages(shows: List[Tuple[str, int, int]]) -> Tuple[Dict[str, int], Dict[int, List[Tuple[str, int, int]]], int]:
+def parse_buffer(data: Union[bytes, mmap.mmap]) -> List[Tuple[str, int, int]]:
     """
-    Assign shows to the minimum number of stages using a greedy algorithm with a min-heap.
-    
-    End times are treated as inclusive, meaning a show ending at time T conflicts 
-    with a show starting at time T.
-    
+    Parses a whole input buffer into (name, start, end) tuples in one pass.
+
+    Drives the per-line work through a single precompiled regex, so the
+    loop over lines runs inside the C matcher instead of Python-level
+    split/strip calls. Used for file input, where the buffer is available
+    up front; stdin goes through parse_lines.
+
     Args:
-        shows: List of (show_name, start_time, end_time) tuples
-        
+        data: Raw input bytes (any bytes-like object, e.g. an mmap)
+
     Returns:
-        Tuple of:
-        - assignments: Dict mapping show names to stage numbers
-        - stage_timelines: Dict mapping stage numbers to lists of shows
-        - num_stages: Total number of stages required
+        List of (show_name, start_time, end_time) tuples
+
+    Raises:
+        ValueError: If input format is invalid
     """
-    if not shows:
-        return {}, {}, 0
-    
-    # Sort shows by start time, then by end time to break ties
-    shows_sorted = sorted(shows, key=lambda s: (s[1], s[2]))
-    
-    # Min-heap to track when stages become free: (end_time, stage_id)
-    occupied = []
-    # Min-heap of available stage IDs
-    free_stage_ids = []
+    shows: List[Tuple[str, int, int]] = []
+    for lineno, match in enumerate(_LINE_RE.finditer(data), 1):
+        name = match.group('name')
+        if name is not None:
+            start = int(match.group('start'))
+            end = int(match.group('end'))
+            if end < start:
+                line = match.group(0).decode('utf-8', 'replace').rstrip()
+                raise ValueError(f"Line {lineno}: end time ({end}) cannot be before start time ({start}): {line!r}")
+            shows.append((name.decode('utf-8'), start, end))
+            continue
+
+        bad = match.group('bad')
+        if bad is not None:
+            # Re-derive the same diagnostics parse_lines would give: too few
+            # tokens and extra trailing tokens are both token-count errors
+            line = bad.decode('utf-8', 'replace').rstrip()
+            parts = line.split(None, 2)
+            if len(parts) < 3 or len(parts[2].split()) > 1:
+                raise ValueError(f"Line {lineno}: expected 3 tokens (name start end), got: {line!r}")
+            raise ValueError(f"Line {lineno}: start/end must be integers: {line!r}")
+
+    return shows
+
+
+def count_stages(starts: List[int], ends: List[int]) -> int:
+    """
+    Computes the minimum number of stages with a sweep-line over sorted events.
+
+    Each show contributes a +1 event at its start and a -1 event at end + 1
+    (end times are inclusive, so a stage frees up one time unit after the end).
+    The peak of the running sum of events equals the minimum number of stages.
+
+    Args:
+        starts: Start times sorted ascending
+        ends: End times in any order
+
+    Returns:
+        Minimum number of stages required
+    """
+    frees = sorted(end + 1 for end in ends)
+
+    peak = 0
+    freed = 0
+    for opened, start in enumerate(starts, 1):
+        # Process all free-up events at or before this start time first,
+        # so a show starting exactly when a stage frees up can reuse it
+        while freed < len(frees) and frees[freed] <= start:
+            freed += 1
+        concurrent = opened - freed
+        if concurrent > peak:
+            peak = concurrent
+
+    return peak
+
+
+def _assign_stages_wheel(starts: List[int], ends: List[int], origin: int, span: int) -> List[int]:
+    """
+    Time-wheel variant of the assignment kernel for compact time ranges.
+
+    Instead of a heap, freed stage IDs are parked in a wheel slot at their
+    free-up time (end + 1) and collected by a cursor that only ever moves
+    forward, so every heap operation becomes an O(1) list append/pop.
+
+    Args:
+        starts: Start times in sorted show order
+        ends: End times in sorted show order
+        origin: Earliest start time (wheel slot 0)
+        span: Number of wheel slots, covering through max(ends) + 1
+
+    Returns:
+        List of 1-based stage IDs, one per show in the same order
+    """
+    wheel: List[List[int]] = [[] for _ in range(span)]
+    free_stack: List[int] = []
     next_stage_id = 1
-    
-    assignments = {}
-    stage_timelines = defaultdict(list)
+    stages: List[int] = []
+    cursor = 0
+
+    extend = free_stack.extend
+
+    for start, end in zip(starts, ends):
+        # Collect every stage that frees up at or before this start time;
+        # the cursor is monotone, so the whole run visits each slot once
+        slot = start - origin
+        while cursor <= slot:
+            extend(wheel[cursor])
+            cursor += 1
+
+        if free_stack:
+            stage = free_stack.pop()
+        else:
+            stage = next_stage_id
+            next_stage_id += 1
+
+        stages.append(stage)
+
+        # End times are inclusive, so the stage frees up one unit later
+        wheel[end + 1 - origin].append(stage)
+
+    return stages
 
-    for name, start, end in shows_sorted:
+
+def _assign_stages_core(starts: List[int], ends: List[int]) -> List[int]:
+    """
+    Integer-only assignment kernel over shows sorted by (start, end).
+
+    Operates on parallel lists of start and end times so the hot loop only
+    touches small integers; show names never enter the loop. Dispatches to
+    the time-wheel kernel when the time span is small enough for it to pay
+    off, otherwise runs the min-heap algorithm.
+
+    Args:
+        starts: Start times in sorted show order
+        ends: End times in sorted show order
+
+    Returns:
+        List of 1-based stage IDs, one per show in the same order
+    """
+    if starts:
+        origin = starts[0]
+        span = max(ends) + 2 - origin
+        if span <= _WHEEL_SPAN_FACTOR * len(starts):
+            return _assign_stages_wheel(starts, ends, origin, span)
+
+    # Min-heap of (end_time << _STAGE_BITS) | stage_id packed ints; a plain
+    # int heap avoids a tuple allocation per push and compares in C
+    occupied: List[int] = []
+    # LIFO stack of available stage IDs; any free stage will do, so a plain
+    # list append/pop is cheaper than keeping a second heap ordered
+    free_stack: List[int] = []
+    next_stage_id = 1
+    stages: List[int] = []
+
+    # Bind frequently-called functions to locals so the hot loop does
+    # LOAD_FAST instead of a module attribute lookup per call
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+
+    for start, end in zip(starts, ends):
         # Free up stages that finished before current show starts
         # Since end times are inclusive, we use <= instead of <
-        while occupied and occupied[0][0] < start:
-            freed_end_time, freed_stage = heapq.heappop(occupied)
-            heapq.heappush(free_stage_ids, freed_stage)
+        while occupied and (occupied[0] >> _STAGE_BITS) < start:
+            free_stack.append(heappop(occupied) & _STAGE_MASK)
 
         # Assign to an available stage or create a new one
-        if free_stage_ids:
-            stage = heapq.heappop(free_stage_ids)
+        if free_stack:
+            stage = free_stack.pop()
         else:
             stage = next_stage_id
             next_stage_id += 1
 
-        # Record the assignment
-        assignments[name] = stage
-        stage_timelines[stage].append((name, start, end))
-        
+        stages.append(stage)
+
         # Mark this stage as occupied until the show ends
-        heapq.heappush(occupied, (end, stage))
+        heappush(occupied, (end << _STAGE_BITS) | stage)
+
+    return stages
+
+
+def assign_stages(shows: List[Tuple[str, int, int]],
+                  build_timelines: bool = True) -> Tuple[array, List[List[Tuple[str, int, int]]], int]:
+    """
+    Assign shows to the minimum number of stages using a greedy algorithm with a min-heap.
+
+    End times are treated as inclusive, meaning a show ending at time T conflicts
+    with a show starting at time T.
+
+    Shows are identified by their position in the input list, so duplicate
+    names are allowed and the assignment table costs 4 bytes per show
+    instead of a dict entry keyed by name.
+
+    Args:
+        shows: List of (show_name, start_time, end_time) tuples
+        build_timelines: Also group shows per stage; callers that only need
+            the assignments or the stage count can pass False to skip the
+            per-stage tuple appends entirely
+
+    Returns:
+        Tuple of:
+        - assignments: array of stage numbers, assignments[i] for shows[i]
+        - stage_timelines: List of per-stage show lists, index i for stage
+          i+1 (empty list when build_timelines is False)
+        - num_stages: Total number of stages required
+    """
+    if not shows:
+        return array('i'), [], 0
+
+    # Structure-of-arrays layout: the kernels only see integers
+    starts = [start for _, start, _ in shows]
+    ends = [end for _, _, end in shows]
+
+    # Sort show IDs by start time, then by end time to break ties.
+    # The bound __getitem__ runs in C, so no Python frame per show
+    keys = list(zip(starts, ends))
+    order = sorted(range(len(shows)), key=keys.__getitem__)
+    starts_sorted = [starts[i] for i in order]
+    ends_sorted = [ends[i] for i in order]
+
+    # The sweep-line prepass gives us the stage count up front, so the
+    # assignment loop below never has to discover it via heap growth
+    num_stages = count_stages(starts_sorted, ends_sorted)
+
+    stages = _assign_stages_core(starts_sorted, ends_sorted)
+
+    assignments = array('i', [0]) * len(shows)
+
+    stage_timelines: List[List[Tuple[str, int, int]]]
+    if build_timelines:
+        # num_stages is known from the prepass, so the per-stage buffers can
+        # be preallocated up front; index i holds the timeline for stage i + 1
+        stage_timelines = [[] for _ in range(num_stages)]
+        for show_id, stage in zip(order, stages):
+            assignments[show_id] = stage
+            stage_timelines[stage - 1].append(shows[show_id])
+    else:
+        stage_timelines = []
+        for show_id, stage in zip(order, stages):
+            assignments[show_id] = stage
 
-    num_stages = next_stage_id - 1
     return assignments, stage_timelines, num_stages
 
 
-def print_schedule(assignments: Dict[str, int], 
-                  stage_timelines: Dict[int, List[Tuple[str, int, int]]], 
-                  num_stages: int, 
+def assign_stages_batch(groups: List[List[Tuple[str, int, int]]],
+                        parallel: bool = False
+                        ) -> List[Tuple[array, List[List[Tuple[str, int, int]]], int]]:
+    """
+    Schedules several independent festivals (e.g. per-day or per-venue
+    show groups) in one call.
+
+    Groups share no state, so they can be scheduled in parallel. With
+    parallel=True the work is spread over a process pool; processes are
+    used rather than threads because the kernels are pure Python and
+    threads would serialize on the GIL.
+
+    Args:
+        groups: List of show lists, one per independent festival
+        parallel: Schedule groups across a process pool when True
+
+    Returns:
+        List of (assignments, stage_timelines, num_stages) tuples, one
+        per group, in input order
+    """
+    if parallel and len(groups) > 1:
+        with concurrent.futures.ProcessPoolExecutor() as pool:
+            return list(pool.map(assign_stages, groups))
+    return [assign_stages(group) for group in groups]
+
+
+def _write_bytes(data: bytes) -> None:
+    """
+    Writes pre-encoded bytes to stdout, bypassing the text-layer encoder.
+
+    Flushes the text layer first so anything already print()ed stays in
+    order, and falls back to a decoding write if stdout has been replaced
+    by an object without a binary buffer (e.g. in tests).
+    """
+    sys.stdout.flush()
+    buffer = getattr(sys.stdout, 'buffer', None)
+    if buffer is not None:
+        buffer.write(data)
+    else:
+        sys.stdout.write(data.decode('utf-8'))
+
+
+def print_schedule(assignments: array,
+                  stage_timelines: List[List[Tuple[str, int, int]]],
+                  num_stages: int,
                   original_order: Optional[List[Tuple[str, int, int]]] = None) -> None:
     """
     Prints the scheduling results in a formatted way.
-    
+
     Args:
-        assignments: Dict mapping show names to stage numbers
-        stage_timelines: Dict mapping stage numbers to lists of shows
+        assignments: Stage number per show, indexed by position in the input
+        stage_timelines: List of per-stage show lists, index i for stage i+1;
+            may be empty if assign_stages ran with build_timelines=False, in
+            which case the grouping is derived here from original_order
         num_stages: Total number of stages required
         original_order: Optional list of shows in original input order
     """
-    print(f"Total stages required: {num_stages}")
-    
+    if not stage_timelines and num_stages and original_order:
+        # assign_stages skipped the grouping; do the same work here, once,
+        # now that we know it is actually needed
+        stage_timelines = [[] for _ in range(num_stages)]
+        keys = [(start, end) for _, start, end in original_order]
+        for show_id in sorted(range(len(original_order)), key=keys.__getitem__):
+            stage_timelines[assignments[show_id] - 1].append(original_order[show_id])
+
+    # Accumulate everything as bytes and emit in a single write on the
+    # binary layer: one print() per show means one formatting/locking
+    # round-trip per line, and going through sys.stdout's text layer would
+    # re-encode the whole buffer a second time
+    out: List[bytes] = [b"Total stages required: %d\n" % num_stages]
+
     if num_stages == 0:
-        print("No shows to schedule.")
+        out.append(b"No shows to schedule.\n")
+        _write_bytes(b''.join(out))
         return
-        
-    print()
-    
+
+    out.append(b"\n")
+
     if original_order:
-        print("Assignments in input order:")
-        for name, start, end in original_order:
-            stage = assignments[name]
-            print(f"  {name}: {start} - {end}  --> Stage {stage}")
-        print()
-    
-    print("Per-stage timelines:")
-    for stage in sorted(stage_timelines.keys()):
-        print(f"Stage {stage}:")
-        # Sort shows on each stage by start time
-        for name, start, end in sorted(stage_timelines[stage], key=lambda t: t[1]):
-            print(f"  {name}: {start} - {end}")
-        print()
+        out.append(b"Assignments in input order:\n")
+        for show_id, (name, start, end) in enumerate(original_order):
+            stage = assignments[show_id]
+            out.append(b"  %s: %d - %d  --> Stage %d\n" % (name.encode('utf-8'), start, end, stage))
+        out.append(b"\n")
 
+    out.append(b"Per-stage timelines:\n")
+    for stage, timeline in enumerate(stage_timelines, 1):
+        out.append(b"Stage %d:\n" % stage)
+        # assign_stages fills each timeline while iterating shows sorted by
+        # (start, end), so the lists are already in start-time order
+        for name, start, end in timeline:
+            out.append(b"  %s: %d - %d\n" % (name.encode('utf-8'), start, end))
+        out.append(b"\n")
 
-def validate_schedule(assignments: Dict[str, int], 
+    _write_bytes(b''.join(out))
+
+
+def validate_schedule(assignments: array,
                      shows: List[Tuple[str, int, int]]) -> bool:
     """
     Validates that the schedule has no overlapping shows on the same stage.
-    
+
     Args:
-        assignments: Dict mapping show names to stage numbers
+        assignments: Stage number per show, indexed by position in shows
         shows: List of (show_name, start_time, end_time) tuples
-        
+
     Returns:
         True if schedule is valid, False otherwise
     """
     # Group shows by stage
-    stage_shows = defaultdict(list)
-    for name, start, end in shows:
-        stage = assignments[name]
+    stage_shows: Dict[int, List[Tuple[str, int, int]]] = defaultdict(list)
+    for show_id, (name, start, end) in enumerate(shows):
+        stage = assignments[show_id]
         stage_shows[stage].append((name, start, end))
     
     # Check each stage for overlaps
@@ -188,12 +474,23 @@ def validate_schedule(assignments: Dict[str, int],
 def main(argv: List[str]) -> None:
     """Main function to run the festival schedule generator."""
     try:
-        # Read input
+        # Read and parse input line by line; no intermediate list of lines
+        # is materialized, so peak memory stays O(number of shows)
         if len(argv) > 1:
             filepath = argv[1]
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
+                # Memory-map the file so the C-driven regex pass (see
+                # parse_buffer) scans the page cache directly, with no
+                # bytes copy of the whole input
+                with open(filepath, 'rb') as f:
+                    try:
+                        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    except (ValueError, OSError):
+                        # Empty file or unmappable input (e.g. a pipe)
+                        shows = parse_buffer(f.read())
+                    else:
+                        with mapped:
+                            shows = parse_buffer(mapped)
             except FileNotFoundError:
                 print(f"Error: File '{filepath}' not found.", file=sys.stderr)
                 sys.exit(1)
@@ -201,17 +498,13 @@ def main(argv: List[str]) -> None:
                 print(f"Error reading file '{filepath}': {e}", file=sys.stderr)
                 sys.exit(1)
         else:
-            # Read from stdin
+            # Read from stdin (already a lazy line iterator)
             try:
-                content = sys.stdin.read().strip()
-                lines = content.splitlines() if content else []
+                shows = parse_lines(sys.stdin)
             except KeyboardInterrupt:
                 print("\nOperation cancelled by user.", file=sys.stderr)
                 sys.exit(1)
 
-        # Parse shows
-        shows = parse_lines(lines)
-        
         if not shows:
             print("No shows found in input.")
             return
@@ -219,10 +512,13 @@ def main(argv: List[str]) -> None:
         # Generate schedule
         assignments, stage_timelines, num_stages = assign_stages(shows)
         
-        # Validate the schedule (optional check)
-        if not validate_schedule(assignments, shows):
-            print("ERROR: Generated schedule is invalid!", file=sys.stderr)
-            sys.exit(1)
+        # The greedy assignment is correct by construction, so the full
+        # re-grouping/re-sorting validation pass is opt-in for debugging
+        # (set FSG_VALIDATE=1) instead of doubling the runtime of every run
+        if os.environ.get('FSG_VALIDATE'):
+            if not validate_schedule(assignments, shows):
+                print("ERROR: Generated schedule is invalid!", file=sys.stderr)
+                sys.exit(1)
         
         # Print results
         print_schedule(assignments, stage_timelines, num_stages, original_order=shows)